@@ -6,164 +6,618 @@ import hmac
 import base64
 import time
 import traceback
+import inspect
+import re
+import threading
+import builtins
+import functools
+import atexit
+import importlib.util
+from collections import namedtuple
+import tkinter as tk
 
 # Try to import customtkinter, fallback if not present (though user installed it)
 try:
     import customtkinter as ctk
     HAS_CTK = True
 except ImportError:
-    import tkinter as tk
     from tkinter import ttk, messagebox, scrolledtext
     HAS_CTK = False
 
+# Optional: numba compiles the fast_hmac_sha256 helper offered to snippets. Only probed here;
+# importing numba is slow, so that waits for the helper's first call (see _fast_hmac_sha256).
+HAS_NUMBA = importlib.util.find_spec("numba") is not None and importlib.util.find_spec("numpy") is not None
+
+# Optional: orjson parses and pretty-prints payloads several times faster than the stdlib json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# orjson turns integers outside [-2**63, 2**64) into floats, which would change what gets signed.
+# That covers every 20+ digit run and 19-digit negatives such as -9223372036854775809.
+_BIG_INT_RE = re.compile(r"-\d{19}|\d{20}")
+
+def _loads(s):
+    """
+    Parses JSON text, keeping integers exact whatever parser is used.
+
+    >>> _loads('{"a": -9223372036854775809, "b": -9999999999999999999}')
+    {'a': -9223372036854775809, 'b': -9999999999999999999}
+    """
+    if HAS_ORJSON and not _BIG_INT_RE.search(s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass # orjson rejects some inputs json accepts (NaN, Infinity); let json decide
+    return json.loads(s)
+
+@functools.lru_cache(maxsize=8)
+def _format_json_cached(s):
+    """
+    Pretty-printed form of the JSON text s; memoized since focus changes re-format the same payload.
+
+    >>> print(_format_json_cached('{"a": NaN, "b": 1e400}'))
+    {
+      "a": NaN,
+      "b": Infinity
+    }
+    """
+    if HAS_ORJSON and not _BIG_INT_RE.search(s):
+        try:
+            # Only round-trip through orjson when it parsed the text: its output writes NaN/Infinity as null
+            return orjson.dumps(orjson.loads(s), option=orjson.OPT_INDENT_2).decode('utf-8')
+        except orjson.JSONDecodeError:
+            pass
+    return json.dumps(json.loads(s), indent=2)
+
 # --- Configuration ---
 # Ensure snippets file is stored in the same directory as the script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 SNIPPETS_FILE = os.path.join(SCRIPT_DIR, "snippets.json")
 DEFAULT_THEME = "dark-blue"  # CustomTkinter theme
+# One "Keys Order" entry: runs between commas, trimmed of surrounding whitespace (inner spaces kept)
+_KEYORDER_RE = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
+SNIPPET_SCHEMA_VERSION = 2  # Bumped when stored snippet code gets migrated on load
+FLUSH_DELAY_MS = 500  # Snippet edits are coalesced and written to disk after this delay
+
+# Legacy `hmac.new(key, msg, hashlib.<algo>).hexdigest()` calls, rewritten to the one-shot hmac.digest()
+_LEGACY_HMAC_RE = re.compile(
+    r"hmac\.new\(\s*(?P<key>(?:[^(),=]|\([^()]*\))+?)\s*,"
+    r"\s*(?P<msg>(?:[^(),=]|\([^()]*\))+?)\s*,"
+    r"\s*hashlib\.(?P<algo>\w+)\s*,?\s*\)\.hexdigest\(\)"
+)
+
+def _source_hash(code):
+    """Short fingerprint of snippet source, used as the compile cache key."""
+    return hashlib.blake2b(code.encode('utf-8'), digest_size=8).hexdigest()
+
+# --- Core Logic: Optional numba HMAC-SHA256 ---
+def _make_numba_hmac():
+    """
+    Builds fast_hmac_sha256(key_bytes, msg_bytes) -> bytes for batch use in snippets.
+    The SHA-256 core is compiled by numba (cached on disk); integer-only math, so the
+    result is bit-exact with hmac.digest(key, msg, 'sha256').
+    """
+    import numba
+    import numpy as np
+
+    jit = numba.njit(cache=True, parallel=False, fastmath=False)
+    k = np.array([
+        0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+        0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+        0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+        0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+        0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+        0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+        0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+        0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+    ], dtype=np.int64)
+    h0 = np.array([
+        0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+    ], dtype=np.int64)
+
+    @jit
+    def rotr(x, n):
+        return ((x >> n) | (x << (32 - n))) & 0xFFFFFFFF
+
+    @jit
+    def sha256(data):
+        length = data.shape[0]
+        padded_len = ((length + 8) // 64 + 1) * 64
+        buf = np.zeros(padded_len, dtype=np.int64)
+        buf[:length] = data
+        buf[length] = 0x80
+        bit_len = length * 8
+        for i in range(8):
+            buf[padded_len - 1 - i] = (bit_len >> (8 * i)) & 0xFF
+
+        h = h0.copy()
+        w = np.zeros(64, dtype=np.int64)
+        for off in range(0, padded_len, 64):
+            for t in range(16):
+                j = off + 4 * t
+                w[t] = (buf[j] << 24) | (buf[j + 1] << 16) | (buf[j + 2] << 8) | buf[j + 3]
+            for t in range(16, 64):
+                s0 = rotr(w[t - 15], 7) ^ rotr(w[t - 15], 18) ^ (w[t - 15] >> 3)
+                s1 = rotr(w[t - 2], 17) ^ rotr(w[t - 2], 19) ^ (w[t - 2] >> 10)
+                w[t] = (w[t - 16] + s0 + w[t - 7] + s1) & 0xFFFFFFFF
+
+            a, b, c, d, e, f, g, hh = h[0], h[1], h[2], h[3], h[4], h[5], h[6], h[7]
+            for t in range(64):
+                s1 = rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)
+                ch = (e & f) ^ (~e & g)
+                t1 = (hh + s1 + ch + k[t] + w[t]) & 0xFFFFFFFF
+                s0 = rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)
+                maj = (a & b) ^ (a & c) ^ (b & c)
+                t2 = (s0 + maj) & 0xFFFFFFFF
+                hh, g, f, e = g, f, e, (d + t1) & 0xFFFFFFFF
+                d, c, b, a = c, b, a, (t1 + t2) & 0xFFFFFFFF
+            h[0] = (h[0] + a) & 0xFFFFFFFF
+            h[1] = (h[1] + b) & 0xFFFFFFFF
+            h[2] = (h[2] + c) & 0xFFFFFFFF
+            h[3] = (h[3] + d) & 0xFFFFFFFF
+            h[4] = (h[4] + e) & 0xFFFFFFFF
+            h[5] = (h[5] + f) & 0xFFFFFFFF
+            h[6] = (h[6] + g) & 0xFFFFFFFF
+            h[7] = (h[7] + hh) & 0xFFFFFFFF
+
+        out = np.empty(32, dtype=np.uint8)
+        for i in range(8):
+            for j in range(4):
+                out[4 * i + j] = (h[i] >> (24 - 8 * j)) & 0xFF
+        return out
+
+    @jit
+    def hmac_sha256(key, msg):
+        if key.shape[0] > 64:
+            key = sha256(key)
+        block = np.zeros(64, dtype=np.uint8)
+        block[:key.shape[0]] = key
+        inner = np.empty(64 + msg.shape[0], dtype=np.uint8)
+        inner[:64] = block ^ 0x36
+        inner[64:] = msg
+        outer = np.empty(64 + 32, dtype=np.uint8)
+        outer[:64] = block ^ 0x5C
+        outer[64:] = sha256(inner)
+        return sha256(outer)
+
+    def fast_hmac_sha256(key, msg):
+        """HMAC-SHA256 over bytes-like `key` and `msg`, returning the raw 32-byte digest."""
+        return hmac_sha256(np.frombuffer(key, dtype=np.uint8), np.frombuffer(msg, dtype=np.uint8)).tobytes()
+
+    return fast_hmac_sha256
+
+_fast_hmac_impl = None
+
+def _fast_hmac_sha256(key, msg):
+    """Snippet-facing fast_hmac_sha256: imports numba and builds the kernels on first use."""
+    global _fast_hmac_impl
+    if _fast_hmac_impl is None:
+        _fast_hmac_impl = _make_numba_hmac()
+    return _fast_hmac_impl(key, msg)
+
+# --- Core Logic: SHA-256 backend check ---
+# Empty SHA-256 state that snippets can .copy() instead of constructing a new hash object per call
+_SHA256_PROTOTYPE = hashlib.sha256()
+
+def _cpu_flags():
+    """Returns the set of CPU feature flags, or None if they can't be determined."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                # x86 lists "flags", ARM lists "Features"
+                if line.startswith(("flags", "Features")):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    try:
+        import cpuinfo
+        return set(cpuinfo.get_cpu_info().get("flags", []))
+    except Exception:
+        return None
+
+def check_sha256_backend():
+    """
+    Prints a one-line warning to stderr if hashlib's SHA-256 is likely running on the scalar fallback:
+    an OpenSSL older than 1.1.1 (no SHA-NI / ARMv8 SHA2 dispatch) or a CPU without SHA extensions.
+    """
+    try:
+        import ssl
+        openssl_ok = ssl.OPENSSL_VERSION_INFO >= (1, 1, 1)
+        openssl_version = ssl.OPENSSL_VERSION
+    except ImportError:
+        openssl_ok, openssl_version = False, "no OpenSSL"
+
+    if not openssl_ok:
+        print(f"Warning: hashlib is using {openssl_version}; rebuild Python against OpenSSL >= 1.1.1 for hardware-accelerated SHA-256.", file=sys.stderr)
+        return
+
+    flags = _cpu_flags()
+    if flags is not None and not flags & {"sha_ni", "sha", "sha2"}:
+        print("Warning: CPU reports no SHA extensions; SHA-256 will run on the scalar code path.", file=sys.stderr)
 
 # --- Core Logic: Snippet Manager ---
 class SnippetManager:
-    def __init__(self, filepath):
+    def __init__(self, filepath, scheduler=None, lazy=False):
         self.filepath = filepath
+        # Tk widget used to schedule deferred saves via after(); threading.Timer if None (headless)
+        self.scheduler = scheduler
         self.snippets = {}
-        self.load_snippets()
+        # Write-through state: edits mark the manager dirty, a deferred flush writes them out
+        self._dirty = False
+        self._flush_handle = None
+        self._last_serialized = b""
+        self._lock = threading.Lock()
+        # Names deleted before the initial load finished; dropped from the loaded snippets too
+        self._pending_deletes = set()
+        self._load_thread = None
+        if scheduler is None:
+            # Headless saves run on a daemon Timer that dies with the interpreter; write them out at exit
+            atexit.register(self.flush)
+        # Per-snippet caches: name -> (source_hash, value). Kept out of
+        # self.snippets so they never end up in snippets.json.
+        self._compiled = {}
+        self._generators = {}
+        self._names_cache = None # tuple, see get_all_names
+        # Set once the first load finished; with lazy=True the caller starts it via load_in_background()
+        self._loaded = threading.Event()
+        if not lazy:
+            self._load_sync()
+
+    def _load_sync(self):
+        try:
+            self.load_snippets()
+        finally:
+            # Even a failed load counts as done, so the UI stops waiting on it
+            self._loaded.set()
+
+    def load_in_background(self):
+        """Loads snippets on a daemon thread so slow disks don't hold up the UI. See is_loaded()."""
+        self._load_thread = threading.Thread(target=self._load_sync, daemon=True)
+        self._load_thread.start()
+
+    def is_loaded(self):
+        return self._loaded.is_set()
+
+    def wait_until_loaded(self, timeout=1.0):
+        """Blocks until the first load finished (or timeout); returns whether it did."""
+        return self._loaded.wait(timeout)
 
     def load_snippets(self):
         if not os.path.exists(self.filepath):
             self.create_default_snippets()
+        on_disk = None
         try:
             with open(self.filepath, 'r') as f:
-                self.snippets = json.load(f)
+                snippets = json.load(f)
+            on_disk = self._serialize(snippets)
         except Exception as e:
             print(f"Error loading snippets: {e}")
-            self.snippets = {}
+            snippets = {}
+
+        migrated = [self._migrate_snippet(entry) for entry in snippets.values()]
+
+        with self._lock:
+            # Edits made while the file was loading win over what was on disk
+            snippets.update(self.snippets)
+            for name in self._pending_deletes:
+                snippets.pop(name, None)
+            self._pending_deletes.clear()
+            self.snippets = snippets
+            self._names_cache = None
+            if on_disk is not None:
+                self._last_serialized = on_disk
+
+        if any(migrated):
+            self.save_snippets()
 
-    def save_snippets(self):
-        try:
-            with open(self.filepath, 'w') as f:
-                json.dump(self.snippets, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving snippets: {e}")
+    def _migrate_snippet(self, entry):
+        """Upgrades a snippet saved by an older version. Returns True if the entry changed."""
+        if "code" not in entry or entry.get("_schema_version", 1) >= SNIPPET_SCHEMA_VERSION:
             return False
+        entry["code"] = _LEGACY_HMAC_RE.sub(r"hmac.digest(\g<key>, \g<msg>, '\g<algo>').hex()", entry["code"])
+        entry["_schema_version"] = SNIPPET_SCHEMA_VERSION
+        return True
+
+    def _serialize(self, snippets=None):
+        return json.dumps(self.snippets if snippets is None else snippets, indent=2).encode('utf-8')
+
+    def save_snippets(self):
+        """Writes snippets to disk now. Skips the write if nothing changed since the last save."""
+        with self._lock:
+            self._dirty = False
+            try:
+                data = self._serialize()
+                if data == self._last_serialized:
+                    return True
+                # Write to a temp file and swap it in, so a crash never leaves a truncated snippets.json
+                tmp_path = self.filepath + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.filepath)
+                self._last_serialized = data
+                return True
+            except Exception as e:
+                print(f"Error saving snippets: {e}")
+                return False
+
+    def _schedule_flush(self):
+        """Marks snippets dirty and arms a single deferred save; edits made meanwhile ride along."""
+        self._dirty = True
+        if self._flush_handle is not None:
+            return
+        if self.scheduler is not None:
+            self._flush_handle = self.scheduler.after(FLUSH_DELAY_MS, self._on_flush_timer)
+        else:
+            self._flush_handle = threading.Timer(FLUSH_DELAY_MS / 1000, self._on_flush_timer)
+            self._flush_handle.daemon = True
+            self._flush_handle.start()
+
+    def _on_flush_timer(self):
+        self._flush_handle = None
+        if self._dirty and not self.is_loaded():
+            # Writing before the file's snippets are in memory would drop them from disk; try again later
+            self._schedule_flush()
+            return
+        if self._dirty:
+            self.save_snippets()
+
+    def flush(self):
+        """Writes pending edits immediately. Call before exiting."""
+        if self._flush_handle is not None:
+            if self.scheduler is not None:
+                self.scheduler.after_cancel(self._flush_handle)
+            else:
+                self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.is_loaded():
+            if self._load_thread is None:
+                return # Nothing loaded, so nothing can be written without losing the file's snippets
+            self._load_thread.join()
+        if self._dirty:
+            self.save_snippets()
 
     def get_snippet(self, name):
+        self.wait_until_loaded()
         return self.snippets.get(name)
 
     def get_all_names(self):
-        return list(self.snippets.keys())
+        """Returns the snippet names as a tuple; the same object until a snippet is added or removed."""
+        with self._lock: # The initial load may be swapping self.snippets on another thread
+            if self._names_cache is None:
+                self._names_cache = tuple(self.snippets.keys())
+            return self._names_cache
+
+    def get_compiled(self, name):
+        """Returns the snippet's code object, compiling only when its source changed."""
+        self.wait_until_loaded()
+        snippet = self.snippets.get(name)
+        if not snippet:
+            return None
+        code = snippet["code"]
+        source_hash = _source_hash(code)
+        cached = self._compiled.get(name)
+        if cached is None or cached[0] != source_hash:
+            cached = (source_hash, compile(code, f"<snippet:{name}>", "exec"))
+            self._compiled[name] = cached
+        return cached[1]
+
+    def get_generator(self, name):
+        """Returns the snippet's normalized `generate` function, executing the module only when its source changed."""
+        code_obj = self.get_compiled(name)
+        if code_obj is None:
+            return None
+        source_hash = self._compiled[name][0]
+        cached = self._generators.get(name)
+        if cached is None or cached[0] != source_hash:
+            cached = (source_hash, CryptoEngine.load_generator(code_obj))
+            self._generators[name] = cached
+        return cached[1]
+
+    def _invalidate(self, name):
+        self._compiled.pop(name, None)
+        self._generators.pop(name, None)
 
     def update_snippet(self, name, code, description=""):
-        self.snippets[name] = {
-            "code": code,
-            "description": description
-        }
-        self.save_snippets()
+        # No waiting on the initial load: it merges this edit in, and flushes hold off until it's done
+        with self._lock:
+            self._pending_deletes.discard(name)
+            if name not in self.snippets:
+                self._names_cache = None
+            self.snippets[name] = {
+                "code": code,
+                "description": description,
+                "_schema_version": SNIPPET_SCHEMA_VERSION
+            }
+        self._invalidate(name)
+        self._schedule_flush()
 
     def delete_snippet(self, name):
-        if name in self.snippets:
-            del self.snippets[name]
-            self.save_snippets()
+        with self._lock:
+            if not self.is_loaded():
+                # The name may only exist in the file that is still loading; drop it from there too
+                self._pending_deletes.add(name)
+            elif name not in self.snippets:
+                return
+            self.snippets.pop(name, None)
+            self._names_cache = None
+        self._invalidate(name)
+        self._schedule_flush()
 
     def create_default_snippets(self):
         # Porting the original ABA HMAC SHA256 logic as the default snippet
         default_code = """
-def generate(payload, passcode, api_key="", key_order=None):
-    import hmac
-    import hashlib
-
-    # 1. Parse Passcode
-    if len(passcode) < 16:
+def generate_prepared(ctx, payload):
+    # ctx is a PreparedCtx: key, IV and API key arrive already UTF-8 encoded, once per run.
+    # Passcode = key + 16-character IV; the length is counted in characters, before encoding.
+    if ctx.passcode_len < 16:
         raise ValueError("PassCode must be at least 16 characters long.")
-    iv = passcode[-16:]
-    key = passcode[:-16]
-
-    # 2. Concat API Key
-    concat_str = api_key if api_key else ""
 
-    # 3. Determine Keys to Sign
+    # 1. Determine Keys to Sign
     keys_to_sign = []
-    if key_order:
+    if ctx.key_order:
         # If explicit order provided, use it
-        keys_to_sign = key_order
+        keys_to_sign = ctx.key_order
     else:
         # Default: all keys except 'hash' and special meta keys
         keys_to_sign = [k for k in payload.keys() if k != 'hash' and k != '__keys_order__']
 
-    # 4. Concat Payload Values
-    for k in keys_to_sign:
-        val = payload.get(k)
-        if val is None: val = ""
-        concat_str += str(val)
-
-    # 5. Create Message
-    message = iv + concat_str
-
-    # 6. Sign
-    signature = hmac.new(
-        key.encode('utf-8'), 
-        message.encode('utf-8'), 
-        hashlib.sha256
-    ).hexdigest()
-    
-    return signature
+    # 2. Concat Payload Values
+    # join() builds the string once; += would copy the growing string for every key
+    get = payload.get
+    concat_str = "".join("" if (v := get(k)) is None else v if isinstance(v, str) else str(v) for k in keys_to_sign)
+
+    # 3. Create Message: IV + API Key + values, only the values need encoding here
+    message = ctx.iv + ctx.api_key + concat_str.encode('utf-8')
+
+    # 4. Sign
+    # hmac.digest() is the one-shot C path (OpenSSL's HMAC), no Python-level HMAC object
+    signature = hmac.digest(ctx.key, message, 'sha256')
+
+    return signature.hex()
 """
         self.snippets["ABA HMAC SHA256"] = {
             "code": default_code.strip(),
-            "description": "Original ABA HMAC-SHA256 Implementation"
+            "description": "Original ABA HMAC-SHA256 Implementation",
+            "_schema_version": SNIPPET_SCHEMA_VERSION
         }
         self.save_snippets()
 
 # --- Core Logic: Crypto Engine ---
+# Inputs that stay constant across a run, encoded once for snippets that define generate_prepared(ctx, payload).
+# ABA-style passcodes carry the key followed by a 16-character IV; `passcode` holds the whole thing.
+# Snippets with other passcode rules check `passcode_len` (in characters) themselves.
+PreparedCtx = namedtuple("PreparedCtx", ["passcode", "passcode_len", "key", "iv", "api_key", "key_order"])
+
+# Globals every snippet runs with, built once. Common modules are injected to make life easier for the user.
+_SNIPPET_GLOBALS = {
+    "__builtins__": builtins,
+    "hashlib": hashlib,
+    "hmac": hmac,
+    "base64": base64,
+    "json": json,
+    "time": time,
+    "SHA256_PROTOTYPE": _SHA256_PROTOTYPE
+}
+if HAS_NUMBA:
+    _SNIPPET_GLOBALS["fast_hmac_sha256"] = _fast_hmac_sha256
+
+class ErrorResult:
+    """
+    A failed snippet run. str() gives the one-line "Error: ..." message; the traceback is only
+    formatted on request, since that walks every frame and reads source files.
+    """
+    def __init__(self, exc):
+        self.exc = exc
+
+    def __str__(self):
+        return f"Error: {str(self.exc)}"
+
+    def format_traceback(self):
+        return "".join(traceback.format_exception(type(self.exc), self.exc, self.exc.__traceback__))
+
 class CryptoEngine:
     @staticmethod
-    def execute_snippet(snippet_code, payload, passcode, api_key="", key_order=None):
+    def prepare_ctx(passcode, api_key="", key_order=None):
+        """Encodes the run's inputs once. Length rules are left to the snippet."""
+        return PreparedCtx(
+            passcode=passcode.encode('utf-8'),
+            passcode_len=len(passcode),
+            key=passcode[:-16].encode('utf-8'),
+            iv=passcode[-16:].encode('utf-8'),
+            api_key=(api_key or "").encode('utf-8'),
+            key_order=key_order
+        )
+
+    @staticmethod
+    def load_generator(snippet_code):
         """
-        Executes the snippet code safely.
-        The snippet MUST define a function `generate(payload, passcode, api_key, key_order)`.
-        Wrapper handles backwards compatibility if key_order is missing in definition.
+        Executes the snippet module (source string or code object) and returns a generator function
+        with the `(payload, passcode, api_key, key_order)` calling convention.
+        Snippets defining `generate_prepared(ctx, payload)` are called through it with a PreparedCtx;
+        otherwise their `generate` function is used.
         """
-        # define execution context
+        # define execution context; each snippet gets its own copy of the shared globals
         local_scope = {}
-        
-        # Inject common modules to make life easier for the user
-        global_scope = {
-            "hashlib": hashlib,
-            "hmac": hmac,
-            "base64": base64,
-            "json": json,
-            "time": time
-        }
+        exec(snippet_code, dict(_SNIPPET_GLOBALS), local_scope)
+
+        prepared = local_scope.get("generate_prepared")
+        if prepared is not None:
+            generator = lambda payload, passcode, api_key, key_order: prepared(CryptoEngine.prepare_ctx(passcode, api_key, key_order), payload)
+            generator.prepared = prepared # Lets execute_batch reuse one ctx for every payload
+            return generator
 
+        if "generate" not in local_scope:
+            raise ValueError("Snippet must define a 'generate' or 'generate_prepared' function.")
+
+        generate_func = local_scope["generate"]
+
+        # Decide the calling convention once instead of probing with TypeError on every call.
+        # Old snippets define generate(payload, passcode, api_key) without key_order.
+        generator = generate_func
         try:
-            exec(snippet_code, global_scope, local_scope)
-            
-            if "generate" not in local_scope:
-                raise ValueError("Snippet must define a 'generate' function.")
-            
-            generate_func = local_scope["generate"]
-            
-            # Simple inspection or try/catch to see if it accepts key_order? 
-            # Or just assume updated signature. For robustness, let's try calling with it, if TypeError, call without.
-            try:
-                return generate_func(payload, passcode, api_key, key_order)
-            except TypeError as te:
-                if "positional argument" in str(te) or "argument" in str(te):
-                     # Fallback for old snippets
-                     return generate_func(payload, passcode, api_key)
-                raise te
-            
-        except Exception as e:
-            # Capture traceback for better debugging in UI
-            return f"Error: {str(e)}\n{traceback.format_exc()}"
+            inspect.signature(generate_func).bind(None, None, None, None)
+        except TypeError:
+            generator = lambda payload, passcode, api_key, key_order: generate_func(payload, passcode, api_key)
+        except ValueError:
+            pass # No signature available (e.g. builtins), call it as-is
+        return generator
+
+    @staticmethod
+    def execute_batch(snippet_code, payloads, passcode, api_key="", key_order=None):
+        """
+        Runs the snippet over a list of payloads, loading it only once, and returns the results in order.
+        If the snippet defines `generate_prepared(ctx, payload)`, passcode and api_key are encoded once
+        into a PreparedCtx shared by every payload. Unlike execute_snippet, errors are raised, not returned.
+        """
+        generate_func = snippet_code if callable(snippet_code) else CryptoEngine.load_generator(snippet_code)
+
+        prepared = getattr(generate_func, "prepared", None)
+        if prepared is not None:
+            ctx = CryptoEngine.prepare_ctx(passcode, api_key, key_order)
+            return [prepared(ctx, payload) for payload in payloads]
+        return [generate_func(payload, passcode, api_key, key_order) for payload in payloads]
+
+    @staticmethod
+    def execute_snippet(snippet_code, payload, passcode, api_key="", key_order=None):
+        """
+        Executes the snippet code safely. Returns the snippet's result, or an ErrorResult if it raised.
+        `snippet_code` may be source text, a compiled code object, or a function returned by load_generator.
+        The snippet MUST define a function `generate(payload, passcode, api_key, key_order)`
+        or `generate_prepared(ctx, payload)`, which receives passcode and api_key pre-encoded in a PreparedCtx.
+        load_generator handles backwards compatibility if key_order is missing in definition.
+        """
+        try:
+            if callable(snippet_code):
+                generate_func = snippet_code
+            else:
+                generate_func = CryptoEngine.load_generator(snippet_code)
+
+            return generate_func(payload, passcode, api_key, key_order)
             
         except Exception as e:
-            # Capture traceback for better debugging in UI
-            return f"Error: {str(e)}\n{traceback.format_exc()}"
+            return ErrorResult(e)
 
 # --- UI Implementation (CustomTkinter) ---
 
+def _set_text(textbox, text):
+    """Replaces a CTkTextbox's content with one Tk call instead of a delete + insert pair."""
+    textbox._textbox.replace("1.0", "end", text)
+
+def _set_entry(entry, text):
+    """Replaces a CTkEntry's text in fewer Tk calls than CTkEntry.delete + insert."""
+    if not text:
+        entry.delete(0, "end") # Lets CTkEntry bring back its placeholder
+        return
+    # CTkEntry.delete on an unfocused entry shows the placeholder, only for insert to hide it again;
+    # clear the inner tk.Entry directly and let insert() handle a placeholder that was already showing.
+    entry._entry.delete(0, "end")
+    entry.insert(0, text)
+
 class SnippetSelectionDialog(ctk.CTkToplevel):
     def __init__(self, parent, snippet_list):
         super().__init__(parent)
@@ -177,17 +631,41 @@ class SnippetSelectionDialog(ctk.CTkToplevel):
         # Label
         ctk.CTkLabel(self, text="Available Snippets:", font=("Arial", 16)).pack(pady=10)
 
-        # Scrollable frame for list
-        self.scroll_frame = ctk.CTkScrollableFrame(self)
-        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
         if not snippet_list:
-            ctk.CTkLabel(self.scroll_frame, text="No snippets found.").pack(pady=20)
-        
-        for name in snippet_list:
-            btn = ctk.CTkButton(self.scroll_frame, text=name, 
-                                command=lambda n=name: self.on_select(n))
-            btn.pack(fill="x", pady=2)
+            ctk.CTkLabel(self, text="No snippets found.").pack(pady=20)
+
+        # One Listbox for all names instead of a CTkButton per snippet: opening stays cheap with many snippets
+        list_frame = ctk.CTkFrame(self)
+        list_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # tk.Listbox isn't themed by CTk: take its colours from the active theme, [light, dark] pairs
+        theme = ctk.ThemeManager.theme
+        mode = 0 if ctk.get_appearance_mode() == "Light" else 1
+        self.listbox = tk.Listbox(list_frame, font=("Arial", 12), activestyle="none",
+                                  bg=theme["CTkFrame"]["fg_color"][mode], fg=theme["CTkLabel"]["text_color"][mode],
+                                  selectbackground=theme["CTkButton"]["fg_color"][mode],
+                                  selectforeground=theme["CTkButton"]["text_color"][mode],
+                                  highlightthickness=0, borderwidth=0)
+        scrollbar = ctk.CTkScrollbar(list_frame, command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+
+        self.listbox.insert("end", *snippet_list)
+        if snippet_list:
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+        # Double-click or Enter loads, Escape cancels
+        self.listbox.bind("<Double-Button-1>", self.on_activate)
+        self.listbox.bind("<Return>", self.on_activate)
+        self.bind("<Escape>", lambda event: self.destroy())
+        self.listbox.focus_set()
+
+    def on_activate(self, event=None):
+        selected = self.listbox.curselection()
+        if selected:
+            self.on_select(self.listbox.get(selected[0]))
             
     def on_select(self, name):
         self.selection = name
@@ -205,7 +683,18 @@ class App(ctk.CTk):
         self.geometry("1000x700")
 
         # Managers
-        self.snippet_manager = SnippetManager(SNIPPETS_FILE)
+        # Snippets load on a worker thread while the widgets are built; _poll_snippets_loaded fills the dropdown
+        self.snippet_manager = SnippetManager(SNIPPETS_FILE, scheduler=self, lazy=True)
+        self.snippet_manager.load_in_background()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Payload auto-actions state (see on_payload_change)
+        self._extract_after_id = None
+        self._last_payload_str = None
+        self._last_keys_written = ""
+        self._last_names_shown = None # See refresh_algo_list
+        self._last_formatted = None
+        self._payload_cache = None # Stripped payload text, dropped on <<Modified>> (see _get_payload)
         
         # Main Layout: 1 column, 1 row (Tabview takes all)
         self.grid_rowconfigure(0, weight=1)
@@ -222,6 +711,7 @@ class App(ctk.CTk):
         # Populate Tabs
         self.setup_generator_tab(self.tab_gen)
         self.setup_editor_tab(self.tab_edit)
+        self._poll_snippets_loaded()
 
         # Appearance (Bottom Right or Menu? Let's put in Editor tab for now or just generic)
         # Or add a small button in corner? 
@@ -273,6 +763,11 @@ class App(ctk.CTk):
         self.btn_execute = ctk.CTkButton(left_frame, text="Generate Hash", height=50, font=("Arial", 16, "bold"), command=self.on_generate)
         self.btn_execute.pack(fill="x", pady=20)
 
+        # Tracebacks are formatted only when shown; HASHGEN_DEBUG turns them on by default
+        self.show_traceback_var = ctk.BooleanVar(value=bool(os.environ.get("HASHGEN_DEBUG")))
+        ctk.CTkCheckBox(left_frame, text="Show traceback", variable=self.show_traceback_var, command=self._render_result).pack(anchor="w")
+        self._last_result = ""
+
         # --- RIGHT COLUMN (Text Areas) ---
 
         # JSON Payload
@@ -283,6 +778,8 @@ class App(ctk.CTk):
         # Auto-actions bindings
         self.gen_payload.bind("<KeyRelease>", self.on_payload_change)
         self.gen_payload.bind("<FocusOut>", self.on_payload_focus_out)
+        self.gen_payload.bind("<<Modified>>", self._payload_modified)
+        self.gen_payload.edit_modified(False) # Arm <<Modified>> after inserting the sample payload
 
         # Output
         ctk.CTkLabel(right_frame, text="Output:", anchor="w").grid(row=2, column=0, sticky="w", pady=(0,5))
@@ -304,7 +801,7 @@ class App(ctk.CTk):
         # Load button moved to top bar
         ctk.CTkButton(top_frame, text="Load", width=100, command=self.on_load_snippet_into_editor).pack(side="right", padx=5)
 
-        ctk.CTkLabel(parent_frame, text="Python Code (Must define 'generate(payload, passcode, api_key)'):", anchor="w").grid(row=1, column=0, padx=20, sticky="w")
+        ctk.CTkLabel(parent_frame, text="Python Code (Must define 'generate(payload, passcode, api_key)' or 'generate_prepared(ctx, payload)'):", anchor="w").grid(row=1, column=0, padx=20, sticky="w")
         
         self.edit_code = ctk.CTkTextbox(parent_frame, font=("Courier", 14))
         self.edit_code.grid(row=2, column=0, padx=20, pady=(5, 20), sticky="nsew")
@@ -321,25 +818,59 @@ def generate(payload, passcode, api_key="", key_order=None):
 
     # --- Actions ---
 
+    def _poll_snippets_loaded(self):
+        # Tk must only be touched from the main thread, so poll instead of calling back from the loader
+        if self.snippet_manager.is_loaded():
+            self.refresh_algo_list()
+        else:
+            self.after(20, self._poll_snippets_loaded)
+
+    def on_close(self):
+        """Writes any pending snippet edits before the window goes away."""
+        self.snippet_manager.flush()
+        self.destroy()
+
     def on_payload_change(self, event=None):
-        """Called on every key release in payload box. Tries to extract keys silently."""
+        """Called on every key release in payload box. Extracts keys silently once typing pauses."""
+        if self._extract_after_id:
+            self.after_cancel(self._extract_after_id)
+        self._extract_after_id = self.after(200, self._on_payload_idle)
+
+    def _on_payload_idle(self):
+        self._extract_after_id = None
         self._try_extract_keys(silent=True)
 
     def on_payload_focus_out(self, event=None):
         """Called when user leaves payload box. Formats JSON and extracts keys."""
+        if self._extract_after_id:
+            self.after_cancel(self._extract_after_id)
+            self._extract_after_id = None
         self._try_format_json()
         self._try_extract_keys(silent=False) # Report errors on explicit focus out? or keep silent? silent is better UX.
         # Actually, let's keep silent unless it's a critical logic step, but for focus out, quiet is good.
 
+    def _payload_modified(self, event=None):
+        self._payload_cache = None
+        # <<Modified>> only fires when the modified flag flips, so clear it to catch the next edit
+        self.gen_payload.edit_modified(False)
+
+    def _get_payload(self):
+        """Returns the stripped payload text, reading it from the widget only after an edit."""
+        if self._payload_cache is None:
+            self._payload_cache = self.gen_payload.get("1.0", "end").strip()
+        return self._payload_cache
+
     def _try_extract_keys(self, silent=True):
         try:
-            payload_str = self.gen_payload.get("1.0", "end").strip()
+            payload_str = self._get_payload()
             if not payload_str: return
+            # Arrow keys, Shift etc. also fire <KeyRelease>; nothing to do if the text is unchanged
+            if payload_str == self._last_payload_str: return
+            self._last_payload_str = payload_str
 
-            data = json.loads(payload_str)
+            data = _loads(payload_str)
             if isinstance(data, dict):
                 keys = [k for k in data.keys() if k != 'hash']
-                current_keys = self.gen_keys.get().strip()
                 new_keys_str = ", ".join(keys)
                 
                 # Only update if different and not empty (to avoid overwriting user manual edits if they are valid? 
@@ -349,61 +880,77 @@ def generate(payload, passcode, api_key="", key_order=None):
                 # The prompt says: "auto extract after paste". 
                 # Simplest IS to overwrite if payload > keys.
                 
-                if current_keys != new_keys_str:
-                    self.gen_keys.delete(0, "end")
-                    self.gen_keys.insert(0, new_keys_str)
+                # Compare against what we last wrote rather than reading the entry back from Tk.
+                # Same key list as last time (e.g. only a value was edited): leave the entry alone.
+                if new_keys_str != self._last_keys_written:
+                    _set_entry(self.gen_keys, new_keys_str)
+                    self._last_keys_written = new_keys_str
         except:
             pass # Silent fail during typing is normal
 
     def _try_format_json(self):
         try:
-            payload_str = self.gen_payload.get("1.0", "end").strip()
+            payload_str = self._get_payload()
             if not payload_str: return
+            # Still exactly what we formatted last time (just clicked in/out): nothing to do
+            if payload_str == self._last_formatted: return
             
-            data = json.loads(payload_str)
-            formatted = json.dumps(data, indent=2)
+            formatted = _format_json_cached(payload_str)
+            self._last_formatted = formatted
             
             # Avoid full replace if identical (prevents cursor jump / unnecessary redraw if just clicked in/out)
             if formatted != payload_str:
-                self.gen_payload.delete("1.0", "end")
-                self.gen_payload.insert("1.0", formatted)
+                _set_text(self.gen_payload, formatted)
+                self._payload_cache = formatted
         except:
             pass
 
     def refresh_algo_list(self):
         names = self.snippet_manager.get_all_names()
-        if not names: names = ["Default"]
-        self.gen_algo_option.configure(values=names)
-        if not self.algo_var.get() in names:
-            self.algo_var.set(names[0])
+        # Same tuple as last time means no snippet was added or removed: skip rebuilding the dropdown menu
+        if names is self._last_names_shown: return
+        self._last_names_shown = names
+
+        values = list(names) if names else ["Default"]
+        self.gen_algo_option.configure(values=values)
+        if not self.algo_var.get() in values:
+            self.algo_var.set(values[0])
 
     def on_generate(self):
         name = self.algo_var.get()
         snippet = self.snippet_manager.get_snippet(name)
         if not snippet:
-             self.gen_output.delete("1.0", "end")
-             self.gen_output.insert("1.0", "Error: No snippet selected.")
+             self._show_result("Error: No snippet selected.")
              return
 
         try:
-            payload_str = self.gen_payload.get("1.0", "end").strip()
-            payload = json.loads(payload_str)
+            payload_str = self._get_payload()
+            payload = _loads(payload_str)
             passcode = self.gen_passcode.get()
             apikey = self.gen_apikey.get()
             
-            keys_str = self.gen_keys.get().strip()
-            key_order = [k.strip() for k in keys_str.split(',') if k.strip()] if keys_str else None
+            key_order = _KEYORDER_RE.findall(self.gen_keys.get()) or None
 
-            result = CryptoEngine.execute_snippet(snippet["code"], payload, passcode, apikey, key_order)
-            
-            self.gen_output.delete("1.0", "end")
-            self.gen_output.insert("1.0", str(result))
+            generate_func = self.snippet_manager.get_generator(name)
+            result = CryptoEngine.execute_snippet(generate_func, payload, passcode, apikey, key_order)
         except json.JSONDecodeError:
-            self.gen_output.delete("1.0", "end")
-            self.gen_output.insert("1.0", "Error: Invalid JSON Payload")
+            result = "Error: Invalid JSON Payload"
         except Exception as e:
-            self.gen_output.delete("1.0", "end")
-            self.gen_output.insert("1.0", f"Error: {str(e)}")
+            result = ErrorResult(e) # e.g. the snippet doesn't compile
+        self._show_result(result)
+
+    def _show_result(self, result):
+        """Displays a generate result (any value, including None) in the Output box."""
+        self._last_result = result
+        self._render_result()
+
+    def _render_result(self):
+        """Re-displays the last result, e.g. when the traceback checkbox is toggled."""
+        result = self._last_result
+        text = str(result)
+        if isinstance(result, ErrorResult) and self.show_traceback_var.get():
+            text += "\n" + result.format_traceback()
+        _set_text(self.gen_output, text)
 
     def on_save_snippet(self):
         name = self.edit_name_entry.get().strip()
@@ -417,6 +964,7 @@ def generate(payload, passcode, api_key="", key_order=None):
         self.refresh_algo_list() # Update dropdown if name is new
 
     def on_load_snippet_into_editor(self):
+        self.snippet_manager.wait_until_loaded()
         names = self.snippet_manager.get_all_names()
         dialog = SnippetSelectionDialog(self, names)
         name = dialog.get_input()
@@ -424,14 +972,14 @@ def generate(payload, passcode, api_key="", key_order=None):
         if name:
             snippet = self.snippet_manager.get_snippet(name)
             if snippet:
-                self.edit_name_entry.delete(0, "end")
-                self.edit_name_entry.insert(0, name)
-                self.edit_code.delete("1.0", "end")
-                self.edit_code.insert("1.0", snippet["code"])
+                _set_entry(self.edit_name_entry, name)
+                _set_text(self.edit_code, snippet["code"])
             else:
                 pass # Not found
 
 if __name__ == "__main__":
+    check_sha256_backend()
+
     if HAS_CTK:
         ctk.set_appearance_mode("Dark")
         ctk.set_default_color_theme("blue")